@@ -1,12 +1,33 @@
+import os
+import time
+from typing import Optional
+
 import yaml
 
 
 class AuthManager:
+    CONFIG_CHECK_INTERVAL = 60
+
     def __init__(self, config_path: str) -> None:
         self.config_path = config_path
+        self._trusted_users: frozenset[int] = frozenset()
+        self._config_mtime: Optional[int] = None
+        self._last_config_check: Optional[float] = None
+
+    def trusted_users(self) -> frozenset[int]:
+        # Check the config file at most once per interval, so that untrusted users cannot cause repeated file reads
+        now = time.monotonic()
+        if self._last_config_check is not None and now - self._last_config_check < self.CONFIG_CHECK_INTERVAL:
+            return self._trusted_users
+        self._last_config_check = now
+        # Only re-parse the config file when it has been modified, so edits still apply without a restart
+        config_mtime = os.stat(self.config_path).st_mtime_ns
+        if config_mtime != self._config_mtime:
+            with open(self.config_path, "r") as f:
+                config_data = yaml.safe_load(f)
+            self._trusted_users = frozenset(config_data.get("trusted_users", []))
+            self._config_mtime = config_mtime
+        return self._trusted_users
 
     def user_is_trusted(self, user_id: int) -> bool:
-        with open(self.config_path, "r") as f:
-            config_data = yaml.safe_load(f)
-        trusted_users = config_data.get("trusted_users", [])
-        return user_id in trusted_users
+        return user_id in self.trusted_users()
@@ -1,44 +1,104 @@
 import asyncio
+import bisect
 import datetime
+import functools
 import html
+import itertools
 import json
 import logging
 import re
 import shlex
-from typing import Optional
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, TypeVar
 
 from prometheus_client import Gauge, start_http_server, Counter, Histogram
 from telethon import TelegramClient, events, Button
+from telethon.tl.custom import Message
+from telethon.tl.types import InputFile, InputFileBig, InputMediaUploadedPhoto, InputMediaUploadedDocument
+
+try:
+    # re2 guarantees linear time matching, so long messages cannot cause backtracking blowups
+    import re2 as link_re_engine
+except ImportError:
+    link_re_engine = re
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+try:
+    # Telethon uses cryptg for encryption when it is installed, which is much faster than its pure python fallback
+    import cryptg
+except ImportError:
+    cryptg = None
 
 from gallery_dl_sub_bot.auth_manager import AuthManager
 from gallery_dl_sub_bot.date_format import format_last_check
 from gallery_dl_sub_bot.gallery_dl_manager import GalleryDLManager
 from gallery_dl_sub_bot.hidden_data import parse_hidden_data, hidden_data
 from gallery_dl_sub_bot.link_fixer import LinkFixer, link_to_str
+from gallery_dl_sub_bot.link_status import LinkStatusMessage
+from gallery_dl_sub_bot.media import upload_media
 from gallery_dl_sub_bot.subscription import SubscriptionDestination, Download
 from gallery_dl_sub_bot.subscription_manager import SubscriptionManager
 
 logger = logging.getLogger(__name__)
+T = TypeVar("T")
 
+LINK_RE = link_re_engine.compile(r"(?i)(?:https?://|www\.)[^\s'\"()[\]]+")
+# Bare domains are matched from the start of a run of domain characters, by consuming the character before the run,
+# so that long tokens without a .com in them are only scanned once, rather than from every position inside them
+BARE_LINK_RE = link_re_engine.compile(r"(?i)(?:^|[^\w.-])[.-]*(\w[\w-]*(?:\.[\w-]+)*\.com[^\s'\"()[\]]+)")
 PROM_PORT = 7168
 start_time = Gauge("gallerydlsubbot_start_unixtime", "Unix timestamp of the last time the bot was started")
-function_usage_count = Counter(
-    "gallerydlsubbot_function_usage_count",
-    "Count of how many times different functions of the bot have been used",
-    labelnames=["function"],
+boop_usage_count = Counter(
+    "gallerydlsubbot_boop_usage_count",
+    "Count of how many times the boop command has been used",
+)
+start_usage_count = Counter(
+    "gallerydlsubbot_start_usage_count",
+    "Count of how many times the start menu has been used",
+)
+subscription_menu_summon_count = Counter(
+    "gallerydlsubbot_subscription_menu_summon_count",
+    "Count of how many times the subscription menu has been summoned",
+)
+gallery_dl_update_menu_summon_count = Counter(
+    "gallerydlsubbot_update_menu_summon_count",
+    "Count of how many times the gallery-dl update menu has been summoned",
+)
+raw_download_usage_count = Counter(
+    "gallerydlsubbot_raw_download_usage_count",
+    "Count of how many raw download requests have been made",
+)
+embed_request_count = Counter(
+    "gallerydlsubbot_embed_request_count",
+    "Count of how many times users have requested a download be embedded as albums",
+)
+zip_request_count = Counter(
+    "gallerydlsubbot_zip_request_count",
+    "Count of how many times users have requested a zip of a download",
+)
+subscribe_request_count = Counter(
+    "gallerydlsubbot_subscribe_request_count",
+    "Count of how many subscription requests have been made",
+)
+unsubscribe_request_count = Counter(
+    "gallerydlsubbot_unsubscribe_request_count",
+    "Count of how many unsubscribe requests have been made",
+)
+pause_request_count = Counter(
+    "gallerydlsubbot_pause_request_count",
+    "Count of how many times subscriptions have been paused",
+)
+unpause_request_count = Counter(
+    "gallerydlsubbot_unpause_request_count",
+    "Count of how many times subscriptions have been resumed",
+)
+url_request_message_count = Counter(
+    "gallerydlsubbot_url_request_message_count",
+    "Count of how many messages containing URLs have been sent to the bot",
 )
-boop_usage_count = function_usage_count.labels(function="Boop")
-start_usage_count = function_usage_count.labels(function="Start menu")
-subscription_menu_summon_count = function_usage_count.labels(function="Summon subscription menu")
-gallery_dl_update_menu_summon_count = function_usage_count.labels(function="Summon update menu")
-raw_download_usage_count = function_usage_count.labels(function="Raw download request")
-embed_request_count = function_usage_count.labels(function="Embed request")
-zip_request_count = function_usage_count.labels(function="Zip request")
-subscribe_request_count = function_usage_count.labels(function="Subscription request")
-unsubscribe_request_count = function_usage_count.labels(function="Unsubscribe request")
-pause_request_count = function_usage_count.labels(function="Pause subscription")
-unpause_request_count = function_usage_count.labels(function="Resume subscription")
-url_request_message_count = function_usage_count.labels(function="URL request")
 failed_auth_attempts = Counter(
     "gallerydlsubbot_failed_auth_attempt_count",
     "Number of times someone has been denied auth for an action they attempted to do",
@@ -59,16 +119,53 @@ initial_download_time = Histogram(
 )
 
 
+def _find_text_links(text: str) -> list[str]:
+    # Bare domains are found in a separate pass, and skipped if they are inside another link
+    link_spans = [match.span() for match in LINK_RE.finditer(text)]
+    # Most messages have no bare domains to find, so skip that pass if there is no .com anywhere
+    if ".com" not in text.lower():
+        return [text[start:end] for start, end in link_spans]
+    link_starts = [start for start, _ in link_spans]
+    bare_spans = []
+    for match in BARE_LINK_RE.finditer(text):
+        start, end = match.span(1)
+        idx = bisect.bisect_right(link_starts, start)
+        if idx > 0 and link_spans[idx - 1][1] > start:
+            continue
+        if idx < len(link_spans) and link_spans[idx][0] < end:
+            continue
+        bare_spans.append((start, end))
+    return [text[start:end] for start, end in sorted(link_spans + bare_spans)]
+
+
 async def _check_sender(evt: events.CallbackQuery.Event, allowed_user_id: int) -> None:
     if evt.sender_id != allowed_user_id:
         await evt.answer("Unauthorized menu use")
         raise events.StopPropagation
 
 
+def _subscription_menu_line(n: int, sub_dest: SubscriptionDestination, on_page: bool) -> str:
+    bpt = "*" if on_page else "-"
+    suffix = ""
+    if sub_dest.subscription.failed_checks > 0:
+        suffix = " (failing checks)"
+    if sub_dest.paused:
+        suffix = " (paused)"
+    return f"{bpt} {n}) {sub_dest.subscription.escaped_link}{suffix}"
+
+
 class Bot:
     SUBS_PER_MENU_PAGE = 10
+    SUBS_MENU_CONTEXT = 10
     MAX_ALBUM_SIZE = 10
     MAX_OFFER_EMBED = 100
+    ZIP_UPLOAD_CONCURRENCY = 3
+    UPLOAD_PART_SIZE_KB = 512
+    DEFAULT_MAX_PARALLEL_DOWNLOADS = 4
+    DEFAULT_MAX_PARALLEL_UPLOADS = 8
+    PROGRESS_UPDATE_SECONDS = 10
+    PROGRESS_DEFER_SECONDS = 0.5
+    MENU_CACHE_SIZE = 256
 
     def __init__(self, config: dict) -> None:
         self.config = config
@@ -82,10 +179,38 @@ class Bot:
         self.auth_manager = AuthManager("trusted_users.yaml")
         self.link_fixer = LinkFixer()
         self.sub_manager = SubscriptionManager(self.client, self.dl_manager, self.link_fixer)
+        self._download_sem = asyncio.Semaphore(
+            self.config.get("max_parallel_downloads", self.DEFAULT_MAX_PARALLEL_DOWNLOADS)
+        )
+        self._upload_sem = asyncio.Semaphore(
+            self.config.get("max_parallel_uploads", self.DEFAULT_MAX_PARALLEL_UPLOADS)
+        )
+        self._callback_handlers = {
+            b"embed": self.handle_embed_callback,
+            b"dl_zip": self.handle_zip_callback,
+            b"subscribe": self.handle_subscribe_callback,
+            b"subs_offset": self.page_subscriptions_menu,
+            b"subs_menu": self.view_subscription_menu,
+            b"unsubscribe": self.handle_unsubscribe_callback,
+            b"pause": self.handle_pause_callback,
+            b"update": self.handle_update_callback,
+        }
+        self._subscriptions_menu_cache: dict[tuple[int, int, int], tuple[str, list[list[Button]]]] = {}
+        self._subscriptions_menu_version: Optional[int] = None
+        self._menu_cache: OrderedDict[tuple[int, int], tuple[Message, dict[str, str]]] = OrderedDict()
+        self._menu_row_locks: weakref.WeakValueDictionary[tuple[int, int], asyncio.Lock] = weakref.WeakValueDictionary()
+        self._link_menu_offers: OrderedDict[tuple[int, int], frozenset[bytes]] = OrderedDict()
 
     def run(self) -> None:
+        if cryptg is None:
+            logger.warning("cryptg is not installed, so telegram uploads and downloads will be slower")
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        asyncio.run(self._run_async())
+
+    async def _run_async(self) -> None:
         start_time.set_to_current_time()
-        self.client.start(bot_token=self.config["telegram"]["bot_token"])
+        await self.client.start(bot_token=self.config["telegram"]["bot_token"])
         # Register functions
         self.client.add_event_handler(self.start, events.NewMessage(pattern="/start", incoming=True))
         self.client.add_event_handler(self.boop, events.NewMessage(pattern="/beep", incoming=True))
@@ -99,14 +224,7 @@ class Bot:
         )
         self.client.add_event_handler(self.raw_download, events.NewMessage(pattern="/raw", incoming=True))
         self.client.add_event_handler(self.check_for_links, events.NewMessage(incoming=True))
-        self.client.add_event_handler(self.handle_embed_callback, events.CallbackQuery(pattern="embed:"))
-        self.client.add_event_handler(self.handle_zip_callback, events.CallbackQuery(pattern="dl_zip:"))
-        self.client.add_event_handler(self.handle_subscribe_callback, events.CallbackQuery(pattern="subscribe:"))
-        self.client.add_event_handler(self.page_subscriptions_menu, events.CallbackQuery(pattern="subs_offset:"))
-        self.client.add_event_handler(self.view_subscription_menu, events.CallbackQuery(pattern="subs_menu:"))
-        self.client.add_event_handler(self.handle_unsubscribe_callback, events.CallbackQuery(pattern="unsubscribe:"))
-        self.client.add_event_handler(self.handle_pause_callback, events.CallbackQuery(pattern="pause:"))
-        self.client.add_event_handler(self.handle_update_callback, events.CallbackQuery(pattern="update:"))
+        self.client.add_event_handler(self.dispatch_callback, events.CallbackQuery())
         # Start prometheus server
         start_http_server(PROM_PORT)
         # Start listening
@@ -115,11 +233,93 @@ class Bot:
             self.sub_manager.start()
             # Start bot listening
             logger.info("Starting bot")
-            self.client.run_until_disconnected()
+            await self.client.run_until_disconnected()
         finally:
-            self.sub_manager.stop()
+            await self.sub_manager.stop()
             logger.info("Bot sleepy bye-bye time")
 
+    async def dispatch_callback(self, event: events.CallbackQuery.Event) -> None:
+        callback_prefix, _, _ = event.query.data.partition(b":")
+        handler = self._callback_handlers.get(callback_prefix)
+        if handler is None:
+            await event.answer("Unrecognised button")
+            raise events.StopPropagation
+        await handler(event)
+
+    async def _get_menu(self, event: events.CallbackQuery.Event) -> tuple[Message, dict[str, str]]:
+        # Cached, so that repeated button presses on an unchanged menu skip the fetch and parse
+        key = (event.chat_id, event.message_id)
+        if key in self._menu_cache:
+            self._menu_cache.move_to_end(key)
+            return self._menu_cache[key]
+        menu_msg = await event.get_message()
+        return self._remember_menu(menu_msg)
+
+    def _remember_menu(self, menu_msg: Message) -> tuple[Message, dict[str, str]]:
+        # Menus are remembered as they are sent or edited, so button presses on them need not fetch the message
+        menu_data = parse_hidden_data(menu_msg)
+        self._menu_cache[(menu_msg.chat_id, menu_msg.id)] = (menu_msg, menu_data)
+        if len(self._menu_cache) > self.MENU_CACHE_SIZE:
+            self._menu_cache.popitem(last=False)
+        return menu_msg, menu_data
+
+    async def _get_authorised_menu(self, event: events.CallbackQuery.Event) -> tuple[Message, dict[str, str]]:
+        # Menus stop being cached once an authorised press is handled, as the callback is about to change them
+        menu_msg, menu_data = await self._get_menu(event)
+        await _check_sender(event, int(menu_data["user_id"]))
+        self._forget_menu(menu_msg)
+        return menu_msg, menu_data
+
+    def _forget_menu(self, menu_msg: Message) -> None:
+        self._menu_cache.pop((menu_msg.chat_id, menu_msg.id), None)
+
+    async def _remove_link_menu_offer(self, menu_msg: Message, menu_data: dict[str, str], offer: bytes) -> bool:
+        # Removes one answered offer from a link menu, deleting the menu once none are left, or returns False if the
+        # offer was already answered. This works from the offers cached as the menu was last sent or edited, under a
+        # lock per menu, as the message a button press fetched may be from before an earlier press was handled
+        key = (menu_msg.chat_id, menu_msg.id)
+        lock = self._menu_row_locks.get(key)
+        if lock is None:
+            lock = self._menu_row_locks[key] = asyncio.Lock()
+        async with lock:
+            offers = self._link_menu_offers.get(key)
+            if offers is None:
+                offers = frozenset(
+                    button.data.partition(b":")[0] for row in (menu_msg.buttons or []) for button in row if button.data
+                )
+            if offer not in offers:
+                return False
+            offers = offers - {offer}
+            if not offers:
+                self._link_menu_offers.pop(key, None)
+                await menu_msg.delete()
+                return True
+            menu_text, menu_buttons = self._link_menu(
+                menu_data["link"],
+                int(menu_data["user_id"]),
+                offers,
+                menu_data.get("already_subscribed") == "yes",
+            )
+            menu_msg = await menu_msg.edit(menu_text, parse_mode="html", link_preview=False, buttons=menu_buttons)
+            self._remember_menu(menu_msg)
+            self._remember_link_menu_offers(menu_msg, offers)
+            return True
+
+    def _remember_link_menu_offers(self, menu_msg: Message, offers: frozenset[bytes]) -> None:
+        key = (menu_msg.chat_id, menu_msg.id)
+        self._link_menu_offers[key] = offers
+        self._link_menu_offers.move_to_end(key)
+        if len(self._link_menu_offers) > self.MENU_CACHE_SIZE:
+            self._link_menu_offers.popitem(last=False)
+
+    async def _with_deferred_progress(self, work: Awaitable[T], progress_update: Callable[[], Awaitable[Any]]) -> T:
+        # Quick actions should not spend a telegram request on a progress message nobody would see
+        work_task = asyncio.ensure_future(work)
+        done, _ = await asyncio.wait([work_task], timeout=self.PROGRESS_DEFER_SECONDS)
+        if not done:
+            await progress_update()
+        return await work_task
+
     # noinspection PyMethodMayBeStatic
     async def boop(self, event: events.NewMessage.Event) -> None:
         boop_usage_count.inc()
@@ -139,35 +339,41 @@ class Bot:
             logger.info("Unauthorised user has sent a msg")
             await event.reply("Apologies, you are not authorised to operate this bot")
             raise events.StopPropagation
-        link_regex = re.compile(r"(https?://|www\.|[^\s/]+\.com)[^\s'\"()[\]]+", re.I)
+        # Skip messages which have nothing to search, such as stickers or media without a caption
+        text = event.message.text or ""
+        if not text and not event.message.buttons:
+            raise events.StopPropagation
+        # Find links in text, skipping the regex scan for text which cannot contain a link
         links = []
-        # Find links in text
-        for link in link_regex.finditer(event.message.text):
-            links.append(link.group(0))
+        if "." in text or "://" in text:
+            links = _find_text_links(text)
         # Find links in buttons
         if event.message.buttons:
-            for button_row in event.message.buttons:
-                for button in button_row:
-                    if button.url:
-                        links.append(button.url)
+            links.extend(button.url for button_row in event.message.buttons for button in button_row if button.url)
         if not links:
             await event.reply("Could not find any links in that message")
             raise events.StopPropagation
-        # Fix all the links
-        fixed_links = []
-        for link in links:
-            fixed_link = self.link_fixer.fix_link(link)
-            if fixed_link not in fixed_links:
-                fixed_links.append(fixed_link)
+        # Fix all the links, removing duplicates but keeping order. Duplicates are removed before fixing too, as the same
+        # link often appears in both the text and a button
+        fixed_links = list(dict.fromkeys(self.link_fixer.fix_links(dict.fromkeys(links))))
         # Increment metrics
         url_request_message_count.inc()
         url_request_url_count.inc(len(fixed_links))
-        # Tell the user all the links
+        # Tell the user all the links, in one message which will track the status of each download
+        link_status = None
         if len(fixed_links) > 1:
-            lines = [f"- {html.escape(link)}" for link in fixed_links]
-            await event.reply("Found these links:\n" + "\n".join(lines), parse_mode="html", link_preview=False)
+            link_status = LinkStatusMessage(fixed_links)
+            await link_status.send(event)
         # Check them in gallery-dl
-        await asyncio.gather(*(self._handle_link(link, event) for link in fixed_links))
+        # Links are independent, so one failing should not stop the others. Failures, including failed downloads, are
+        # all logged here, once each
+        results = await asyncio.gather(
+            *(self._handle_link(link, event, link_status=link_status) for link in fixed_links),
+            return_exceptions=True,
+        )
+        for link, result in zip(fixed_links, results):
+            if isinstance(result, BaseException):
+                logger.error("Failed to handle link %s", link, exc_info=result)
         raise events.StopPropagation
 
     async def _handle_link(
@@ -175,8 +381,14 @@ class Bot:
             link: str | list[str],
             event: events.NewMessage.Event,
             allow_auto_embed: bool = True,
+            link_status: Optional[LinkStatusMessage] = None,
     ) -> None:
-        dl, lines = await self._download_link(link, event)
+        # Limit how many gallery-dl downloads run at once, across all chats
+        async with self._download_sem:
+            if link_status is None:
+                dl, lines = await self._download_link(link, event)
+            else:
+                dl, lines = await self._download_link_with_status(link, link_status)
         link_str = link_to_str(link)
         # If no images, stop now
         if len(lines) == 0:
@@ -196,40 +408,59 @@ class Bot:
             offer_embed_msg = f"Would you like me to send them as Telegram albums anyway?{hidden_link}"
             if not allow_auto_embed:
                 offer_embed_msg = f"Would you like me to send them as Telegram albums?{hidden_link}"
-            await event.reply(
+            self._remember_menu(await event.reply(
                 offer_embed_msg,
                 parse_mode="html",
                 buttons=[[
                     Button.inline("Yes", "embed:yes"),
                     Button.inline("No thanks", "embed:no")
                 ]]
-            )
-        # Offer to zip up the feed
-        await event.reply(
-            f"Would you like to download these files as a zip?{hidden_link}",
+            ))
+        # Offer to zip up the feed and, unless already subscribed, to subscribe, all in one menu
+        already_subscribed = bool(self.sub_manager.sub_for_link_and_chat(link_str, event.chat_id))
+        offers = frozenset([b"dl_zip"] if already_subscribed else [b"dl_zip", b"subscribe"])
+        menu_text, menu_buttons = self._link_menu(link_str, event.sender_id, offers, already_subscribed)
+        menu_msg = await event.reply(
+            menu_text,
             parse_mode="html",
-            buttons=[[
-                Button.inline("Yes", "dl_zip:yes"),
-                Button.inline("No thanks", "dl_zip:no"),
-            ]]
+            buttons=menu_buttons,
+            link_preview=False,
         )
-        # Unless already subscribed, offer to subscribe
-        if self.sub_manager.sub_for_link_and_chat(link_str, event.chat_id):
-            await event.reply(
-                f"You are already subscribed to {html.escape(link_str)} in this chat.",
-                parse_mode="html",
-                link_preview=False,
-            )
-        else:
-            await event.reply(
-                f"Would you like to subscribe to {html.escape(link_str)}?{hidden_link}",
-                parse_mode="html",
-                buttons=[[
-                    Button.inline("Yes, subscribe", "subscribe:yes"),
-                    Button.inline("No thanks", "subscribe:no"),
-                ]],
-                link_preview=False,
-            )
+        self._remember_menu(menu_msg)
+        self._remember_link_menu_offers(menu_msg, offers)
+
+    # noinspection PyMethodMayBeStatic
+    def _link_menu(
+            self,
+            link_str: str,
+            user_id: int,
+            offers: frozenset[bytes],
+            already_subscribed: bool,
+    ) -> tuple[str, list[list[Button]]]:
+        # Each offer gets a question and a row of buttons, and any note about an existing subscription stays put
+        escaped_link = html.escape(link_str)
+        menu_lines = []
+        menu_buttons = []
+        if b"dl_zip" in offers:
+            menu_lines.append("Would you like to download these files as a zip?")
+            menu_buttons.append([
+                Button.inline("Download zip", "dl_zip:yes"),
+                Button.inline("No zip", "dl_zip:no"),
+            ])
+        if b"subscribe" in offers:
+            menu_lines.append(f"Would you like to subscribe to {escaped_link}?")
+            menu_buttons.append([
+                Button.inline("Subscribe", "subscribe:yes"),
+                Button.inline("Don't subscribe", "subscribe:no"),
+            ])
+        if already_subscribed:
+            menu_lines.append(f"You are already subscribed to {escaped_link} in this chat.")
+        hidden_link = hidden_data({
+            "link": link_str,
+            "user_id": str(user_id),
+            "already_subscribed": "yes" if already_subscribed else "no",
+        })
+        return "\n".join(menu_lines) + hidden_link, menu_buttons
 
     async def _download_link(
             self,
@@ -237,180 +468,247 @@ class Bot:
             request_evt: events.NewMessage.Event,
     ) -> tuple[Download, list[str]]:
         link_str = link_to_str(link)
+        escaped_link = html.escape(link_str)
         evt = await request_evt.reply(
-            f"⏳ Downloading link: {html.escape(link_str)}",
+            f"⏳ Downloading link: {escaped_link}",
             parse_mode="html",
             link_preview=False,
         )
-        lines = []
-        last_progress_update = datetime.datetime.now(datetime.timezone.utc)
-        last_line_count: Optional[int] = None
+
+        async def update_progress(line_count: int) -> None:
+            await evt.edit(
+                f"⏳ Downloading link: {escaped_link}\n(Found {line_count} images so far...)",
+                parse_mode="html",
+                link_preview=False,
+            )
+
+        try:
+            dl, lines = await self._run_download(link, update_progress)
+        except Exception as e:
+            await request_evt.reply(f"Failed to download link {escaped_link} :(")
+            await evt.delete()
+            raise e
+        # Post update on feed size
+        await request_evt.reply(f"Found {len(lines)} images(s) in link: {escaped_link}", parse_mode="html")
+        await evt.delete()
+        return dl, lines
+
+    async def _download_link_with_status(
+            self,
+            link: str,
+            link_status: LinkStatusMessage,
+    ) -> tuple[Download, list[str]]:
+        # Progress is posted by editing the shared status message, rather than sending messages for each link
+        await link_status.set_status(link, "⏳ Downloading")
+
+        async def update_progress(line_count: int) -> None:
+            await link_status.set_status(link, f"⏳ Downloading (Found {line_count} images so far...)")
+
+        try:
+            dl, lines = await self._run_download(link, update_progress)
+        except Exception as e:
+            await link_status.set_status(link, "❌ Failed to download :(")
+            raise e
+        await link_status.set_status(link, f"✅ Found {len(lines)} image(s)")
+        return dl, lines
+
+    async def _run_download(
+            self,
+            link: str | list[str],
+            update_progress: Callable[[int], Awaitable[None]],
+    ) -> tuple[Download, list[str]]:
+        batches: list[list[str]] = []
+        line_count = 0
+
+        async def progress_loop() -> None:
+            # Edits happen at a bounded rate here, so the download loop never waits on telegram
+            last_line_count = 0
+            while True:
+                await asyncio.sleep(self.PROGRESS_UPDATE_SECONDS)
+                if line_count == last_line_count:
+                    continue
+                last_line_count = line_count
+                try:
+                    await update_progress(line_count)
+                except Exception as progress_e:
+                    logger.warning("Failed to update download progress message", exc_info=progress_e)
+
+        progress_task = asyncio.create_task(progress_loop())
         with initial_download_time.time():
             try:
                 dl = await self.sub_manager.create_download(link)
                 async for lines_batch in dl.download():
-                    lines += lines_batch
-                    now = datetime.datetime.now(datetime.timezone.utc)
-                    line_count = len(lines)
-                    if (now - last_progress_update) < datetime.timedelta(seconds=10) or line_count == last_line_count:
-                        continue
-                    await evt.edit(
-                        f"⏳ Downloading link: {html.escape(link_str)}\n(Found {line_count} images so far...)",
-                        parse_mode="html",
-                        link_preview=False,
-                    )
-                    last_progress_update = datetime.datetime.now(datetime.timezone.utc)
-                    last_line_count = line_count
-            except Exception as e:
-                logger.error(f"Failed to download link {link}", exc_info=e)
-                await request_evt.reply(f"Failed to download link {html.escape(link_str)} :(")
-                await evt.delete()
-                raise e
-        # Post update on feed size
+                    batches.append(lines_batch)
+                    line_count += len(lines_batch)
+            finally:
+                progress_task.cancel()
+        lines = list(itertools.chain.from_iterable(batches))
         initial_download_size.observe(len(lines))
-        await request_evt.reply(f"Found {len(lines)} images(s) in link: {html.escape(link_str)}", parse_mode="html")
-        await evt.delete()
         return dl, lines
 
     async def _post_album(self, event: events.NewMessage.Event, lines: list[str], link: str) -> None:
+        caption, media = await self._prepare_album(lines, link)
+        await event.reply(caption, parse_mode="html", file=media)
+        return
+
+    async def _prepare_album(
+            self,
+            lines: list[str],
+            link: str,
+    ) -> tuple[str, list[InputMediaUploadedPhoto | InputMediaUploadedDocument]]:
         caption = f"{html.escape(link_to_str(link))}"
         # Check for caption override
         data_file = f"{lines[0]}.json"
-        caption_override = self.link_fixer.override_caption(link, data_file)
+        caption_override = await self.link_fixer.override_caption(link, data_file)
         if caption_override:
             caption = caption_override
-        # Post the album
-        await event.reply(caption, parse_mode="html", file=lines)
-        return
+        # Upload the files concurrently, ready to post the album
+        media = await asyncio.gather(*(self._upload_media(line) for line in lines))
+        return caption, media
+
+    async def _upload_file(self, file_path: str) -> InputFile | InputFileBig:
+        # Telethon picks smaller parts for smaller files, but the largest part size means fewer upload requests.
+        # Uploads from the menu and link handlers are limited across all chats, so that many albums at once do not hit
+        # telegram flood limits. Subscription posts upload separately, one file at a time
+        async with self._upload_sem:
+            return await self.client.upload_file(file_path, part_size_kb=self.UPLOAD_PART_SIZE_KB)
+
+    async def _upload_media(self, file_path: str) -> InputMediaUploadedPhoto | InputMediaUploadedDocument:
+        async with self._upload_sem:
+            return await upload_media(self.client, file_path, self.UPLOAD_PART_SIZE_KB)
 
     async def handle_embed_callback(self, event: events.CallbackQuery.Event) -> None:
         query_data = event.query.data
-        query_resp = query_data.removeprefix(b"embed:")
         logger.info(f"Callback query pressed: {query_data}")
-        menu_msg = await event.get_message()
         # Parse menu data
-        menu_data = parse_hidden_data(menu_msg)
+        menu_msg, menu_data = await self._get_authorised_menu(event)
         link = menu_data["link"]
-        user_id = int(menu_data["user_id"])
-        # Check button is pressed by user who summoned the menu
-        await _check_sender(event, user_id)
         # Find the matching Download
         dl = self.sub_manager.download_for_link(link)
         if dl is None:
             await menu_msg.edit("Error: This download seems to have disappeared", buttons=None)
             raise events.StopPropagation
         # Handle no button
-        if query_resp == b"no":
+        if query_data == b"embed:no":
             await menu_msg.delete()
             raise events.StopPropagation
         # Handle yes button
-        if query_resp == b"yes":
+        if query_data == b"embed:yes":
             embed_request_count.inc()
             lines = dl.list_files()
             link_msg = await menu_msg.get_reply_message()
-            for start in range(0, len(lines), self.MAX_ALBUM_SIZE):
-                lines_chunk = lines[start:start + self.MAX_ALBUM_SIZE]
-                await self._post_album(link_msg, lines_chunk, link)
-                await menu_msg.delete()
+            # Upload every album's files concurrently, then post the albums in order
+            albums = await asyncio.gather(*(
+                self._prepare_album(lines[start:start + self.MAX_ALBUM_SIZE], link)
+                for start in range(0, len(lines), self.MAX_ALBUM_SIZE)
+            ))
+            for caption, media in albums:
+                await link_msg.reply(caption, parse_mode="html", file=media)
+            await menu_msg.delete()
             raise events.StopPropagation
         # Handle other callback data
         await event.answer("Unrecognised response")
 
     async def handle_zip_callback(self, event: events.CallbackQuery.Event) -> None:
         query_data = event.query.data
-        query_resp = query_data.removeprefix(b"dl_zip:")
         logger.info(f"Callback query pressed: {query_data}")
-        menu_msg = await event.get_message()
         # Parse menu data
-        menu_data = parse_hidden_data(menu_msg)
+        menu_msg, menu_data = await self._get_authorised_menu(event)
         link = menu_data["link"]
-        user_id = int(menu_data["user_id"])
-        # Check button is pressed by user who summoned the menu
-        await _check_sender(event, user_id)
+        escaped_link = html.escape(link)
         # Find the matching Download
         dl = self.sub_manager.download_for_link(link)
         if dl is None:
             await menu_msg.edit("Error: This download seems to have disappeared", buttons=None)
             raise events.StopPropagation
         # Handle no button
-        if query_resp == b"no":
-            await menu_msg.delete()
+        if query_data == b"dl_zip:no":
+            await self._remove_link_menu_offer(menu_msg, menu_data, b"dl_zip")
             raise events.StopPropagation
         # Handle yes button
-        if query_resp == b"yes":
+        if query_data == b"dl_zip:yes":
+            # A link menu's zip offer is answered once, but a subscription's menu can request zips any number of times
+            is_link_menu = "already_subscribed" in menu_data
+            if is_link_menu and not await self._remove_link_menu_offer(menu_msg, menu_data, b"dl_zip"):
+                await event.answer("This zip has already been answered")
+                raise events.StopPropagation
             zip_request_count.inc()
-            await menu_msg.edit("⏳ Creating zip archive...", buttons=None)
+            await event.answer("⏳ Creating zip archive...")
             zip_filename = self.link_fixer.link_to_filename(link)
             async with dl.zip(zip_filename) as zip_files:
                 link_msg = await menu_msg.get_reply_message()
-                if len(zip_files) == 1:
+                # Upload the parts concurrently, then post them in order
+                upload_sem = asyncio.Semaphore(self.ZIP_UPLOAD_CONCURRENCY)
+
+                async def upload_part(zip_file: str) -> InputFile | InputFileBig:
+                    async with upload_sem:
+                        return await self._upload_file(zip_file)
+
+                zip_handles = await asyncio.gather(*(upload_part(zip_file) for zip_file in zip_files))
+                if len(zip_handles) == 1:
                     await link_msg.reply(
-                        f"Here is the zip archive of {html.escape(link)}",
-                        file=zip_files[0],
+                        f"Here is the zip archive of {escaped_link}",
+                        file=zip_handles[0],
                         parse_mode="html",
                         link_preview=False,
                     )
-                    await menu_msg.delete()
                 else:
-                    zip_count = len(zip_files)
+                    zip_count = len(zip_handles)
                     await link_msg.reply(
                         f"Due to telegram size limits, zip archive was split into {zip_count} parts.\n"
-                        f"Here is part 1/{zip_count} of the zip archive of {html.escape(link)}\n"
+                        f"Here is part 1/{zip_count} of the zip archive of {escaped_link}\n"
                         "Please download all parts before attempting to unzip the archive",
-                        file=zip_files[0],
+                        file=zip_handles[0],
                         parse_mode="html",
                         link_preview=False,
                     )
-                    for n, zip_file in enumerate(zip_files[1:], start=2):
+                    for n, zip_handle in enumerate(zip_handles[1:], start=2):
                         await link_msg.reply(
-                            f"Here is part {n}/{zip_count} of the zip archive of {html.escape(link)}",
-                            file=zip_file,
+                            f"Here is part {n}/{zip_count} of the zip archive of {escaped_link}",
+                            file=zip_handle,
                             parse_mode="html",
                             link_preview=False,
                         )
-                    await menu_msg.delete()
             raise events.StopPropagation
         # Handle other callback data
         await event.answer("Unrecognised response")
 
     async def handle_subscribe_callback(self, event: events.CallbackQuery.Event) -> None:
         query_data = event.query.data
-        query_resp = query_data.removeprefix(b"subscribe:")
         logger.info(f"Callback query pressed: {query_data}")
-        menu_msg = await event.get_message()
         # Parse menu data
-        menu_data = parse_hidden_data(menu_msg)
+        menu_msg, menu_data = await self._get_authorised_menu(event)
         link = menu_data["link"]
+        escaped_link = html.escape(link)
         user_id = int(menu_data["user_id"])
-        # Check button is pressed by user who summoned the menu
-        await _check_sender(event, user_id)
         # Find matching Download
         dl = self.sub_manager.download_for_link(link)
         if dl is None:
             await menu_msg.edit("Error: This download seems to have disappeared", buttons=None)
             raise events.StopPropagation
         # Handle no button
-        if query_resp == b"no":
-            await menu_msg.delete()
+        if query_data == b"subscribe:no":
+            await self._remove_link_menu_offer(menu_msg, menu_data, b"subscribe")
             raise events.StopPropagation
         # Handle yes button press
-        if query_resp == b"yes":
+        if query_data == b"subscribe:yes":
+            if not await self._remove_link_menu_offer(menu_msg, menu_data, b"subscribe"):
+                await event.answer("This subscription has already been answered")
+                raise events.StopPropagation
             subscribe_request_count.inc()
-            await menu_msg.edit("⏳ Subscribing...", buttons=None)
+            await event.answer("⏳ Subscribing...")
+            link_msg = await menu_msg.get_reply_message()
             try:
                 await self.sub_manager.create_subscription(menu_msg.chat_id, user_id, dl)
             except Exception as e:
                 logger.error(f"Failed to subscribe to {link}", exc_info=e)
-                await menu_msg.edit(
-                    f"Failed to create subscription to {html.escape(link)}",
+                await link_msg.reply(
+                    f"Failed to create subscription to {escaped_link}",
                     parse_mode="html",
                     link_preview=False,
-                    buttons=None,
                 )
                 raise e
-            link_msg = await menu_msg.get_reply_message()
-            await link_msg.reply(f"Subscription created for {html.escape(link)}", parse_mode="html", link_preview=False)
-            await menu_msg.delete()
+            await link_msg.reply(f"Subscription created for {escaped_link}", parse_mode="html", link_preview=False)
             raise events.StopPropagation
         # Handle other callback data
         await event.answer("Unrecognised response")
@@ -419,24 +717,52 @@ class Bot:
         subscription_menu_summon_count.inc()
         chat_id = event.chat_id
         user_id = event.sender_id
-        sub_dests = self.sub_manager.list_subscriptions(chat_id, user_id)
-        if len(sub_dests) == 0:
+        menu = self._subscriptions_menu(chat_id, user_id, 0)
+        if menu is None:
             await event.reply("You have no subscriptions in this chat. Send a link to create one")
             raise events.StopPropagation
-        await event.reply(
-            self._list_subscriptions_menu_text(sub_dests, 0, user_id),
+        menu_text, menu_buttons = menu
+        menu_msg = await event.reply(
+            menu_text,
             parse_mode="html",
             link_preview=False,
-            buttons=self._list_subscriptions_menu_buttons(sub_dests, 0),
+            buttons=menu_buttons,
         )
+        self._remember_menu(menu_msg)
         raise events.StopPropagation
 
+    def _subscriptions_menu(
+            self,
+            chat_id: int,
+            user_id: int,
+            offset: int,
+    ) -> Optional[tuple[str, list[list[Button]]]]:
+        # Renders are cached until the subscription manager next saves a change
+        if self._subscriptions_menu_version != self.sub_manager.version:
+            self._subscriptions_menu_cache.clear()
+            self._subscriptions_menu_version = self.sub_manager.version
+        key = (chat_id, user_id, offset)
+        if key in self._subscriptions_menu_cache:
+            return self._subscriptions_menu_cache[key]
+        sub_dests = self.sub_manager.list_subscriptions(chat_id, user_id)
+        if len(sub_dests) == 0:
+            return None
+        menu = (
+            self._list_subscriptions_menu_text(sub_dests, offset, user_id),
+            self._list_subscriptions_menu_buttons(sub_dests, offset),
+        )
+        if len(self._subscriptions_menu_cache) >= self.MENU_CACHE_SIZE:
+            self._subscriptions_menu_cache.clear()
+        self._subscriptions_menu_cache[key] = menu
+        return menu
+
+    # noinspection PyMethodMayBeStatic
+    def _cap_subs_offset(self, subs: list[SubscriptionDestination], offset: int) -> int:
+        # Offsets come from callback data, which can be stale after subscriptions are removed
+        return min(max(offset, 0), len(subs) - 1)
+
     def _list_subscriptions_menu_buttons(self, subs: list[SubscriptionDestination], offset: int) -> list[list[Button]]:
-        # Cap offset
-        if offset < 0:
-            offset = 0
-        if offset >= len(subs):
-            offset = len(subs) - 1
+        offset = self._cap_subs_offset(subs, offset)
         # Get the page's subscription list
         subs_page = subs[offset:offset+self.SUBS_PER_MENU_PAGE]
         # Construct the pagination buttons
@@ -450,30 +776,32 @@ class Bot:
             next_offset = offset + self.SUBS_PER_MENU_PAGE
             pagination_row.append(Button.inline("➡️Next", f"subs_offset:{next_offset}"))
         # Construct button list
-        return [
-                [Button.inline(f"{n}) {sub.subscription.link_str}", f"subs_menu:{n}")]
-                for n, sub in enumerate(subs_page, start=1+offset)
-            ] + [
-            pagination_row
+        buttons = [
+            [Button.inline(f"{n}) {sub.subscription.link_str}", f"subs_menu:{n}")]
+            for n, sub in enumerate(subs_page, start=1+offset)
         ]
+        # Only add pagination buttons if there is more than one page
+        if pagination_row:
+            buttons.append(pagination_row)
+        return buttons
 
     def _list_subscriptions_menu_text(self, subs: list[SubscriptionDestination], offset: int, user_id: int) -> str:
+        offset = self._cap_subs_offset(subs, offset)
         menu_data = hidden_data({"offset": str(offset), "user_id": str(user_id)})
         menu_text = f"{menu_data}You have {len(subs)} subscriptions in this chat:\n"
-        lines = []
-        for n, sub in enumerate(subs, start=1):
-            bpt = "-"
-            idx = n - 1
-            if offset <= idx < offset + self.SUBS_PER_MENU_PAGE:
-                bpt = "*"
-            suffix = ""
-            if sub.subscription.failed_checks > 0:
-                suffix = " (failing checks)"
-            if sub.paused:
-                suffix = " (paused)"
-            lines.append(f"{bpt} {n}) {html.escape(sub.subscription.link_str)}{suffix}")
-        menu_text += "\n".join(lines)
-        return menu_text
+        page_end = offset + self.SUBS_PER_MENU_PAGE
+        # Telegram limits message length, so only list the subscriptions around the current page
+        window_start = max(offset - self.SUBS_MENU_CONTEXT, 0)
+        window_end = min(page_end + self.SUBS_MENU_CONTEXT, len(subs))
+        lines = [
+            _subscription_menu_line(n, sub, offset < n <= page_end)
+            for n, sub in enumerate(subs[window_start:window_end], start=window_start + 1)
+        ]
+        if window_start > 0:
+            lines.insert(0, "...")
+        if window_end < len(subs):
+            lines.append("...")
+        return menu_text + "\n".join(lines)
 
     async def page_subscriptions_menu(self, event: events.CallbackQuery.Event) -> None:
         # Parse callback data
@@ -481,25 +809,24 @@ class Bot:
         query_resp = query_data.removeprefix(b"subs_offset:")
         offset = int(query_resp)
         # Parse menu data
-        menu_msg = await event.get_message()
-        menu_data = parse_hidden_data(menu_msg)
+        menu_msg, menu_data = await self._get_authorised_menu(event)
         user_id = int(menu_data["user_id"])
-        # Check button is pressed by user who summoned the menu
-        await _check_sender(event, user_id)
-        # Get subscription list
+        # Get subscription list menu
         chat_id = event.chat_id
-        sub_dests = self.sub_manager.list_subscriptions(chat_id, user_id)
+        menu = self._subscriptions_menu(chat_id, user_id, offset)
         # Handle empty subscription list
-        if len(sub_dests) == 0:
+        if menu is None:
             await menu_msg.edit("You have no subscriptions in this chat. Send a link to create one")
             raise events.StopPropagation
         # Send menu
-        await menu_msg.edit(
-            self._list_subscriptions_menu_text(sub_dests, offset, user_id),
+        menu_text, menu_buttons = menu
+        menu_msg = await menu_msg.edit(
+            menu_text,
             parse_mode="html",
             link_preview=False,
-            buttons=self._list_subscriptions_menu_buttons(sub_dests, offset),
+            buttons=menu_buttons,
         )
+        self._remember_menu(menu_msg)
         raise events.StopPropagation
 
     async def view_subscription_menu(self, event: events.CallbackQuery.Event) -> None:
@@ -508,12 +835,9 @@ class Bot:
         query_resp = query_data.removeprefix(b"subs_menu:")
         view_sub_idx = int(query_resp) - 1
         # Parse menu data
-        menu_msg = await event.get_message()
-        menu_data = parse_hidden_data(menu_msg)
+        menu_msg, menu_data = await self._get_authorised_menu(event)
         offset = int(menu_data["offset"])
         user_id = int(menu_data["user_id"])
-        # Check button is pressed by user who summoned the menu
-        await _check_sender(event, user_id)
         # Get subscription list
         chat_id = event.chat_id
         sub_dests = self.sub_manager.list_subscriptions(chat_id, user_id)
@@ -540,7 +864,7 @@ class Bot:
             "user_id": user_id,
         }
         # Send menu
-        view_sub_lines = [f"{hidden_data(msg_data)}Viewing subscription: {html.escape(sub.link_str)}"]
+        view_sub_lines = [f"{hidden_data(msg_data)}Viewing subscription: {sub.escaped_link}"]
         view_sub_lines += [f"Created: {format_last_check(sub_dest.created_date)}"]
         if sub.failed_checks > 0:
             view_sub_lines += [f"Failed last {sub.failed_checks} checks"]
@@ -551,7 +875,7 @@ class Bot:
             view_sub_lines += ["Subscription is paused."]
             pause_button = "Resume subscription"
             pause_callback = "pause:resume"
-        await menu_msg.edit(
+        menu_msg = await menu_msg.edit(
             "\n".join(view_sub_lines),
             parse_mode="html",
             link_preview=False,
@@ -562,34 +886,39 @@ class Bot:
                 [Button.inline("⬅️Back to list", f"subs_offset:{offset}")]
             ],
         )
+        self._remember_menu(menu_msg)
         raise events.StopPropagation
 
     async def handle_unsubscribe_callback(self, event: events.CallbackQuery.Event) -> None:
         # Parse callback data
         query_data = event.query.data
-        query_resp = query_data.removeprefix(b"unsubscribe:")
-        if query_resp != b"yes":
+        if query_data != b"unsubscribe:yes":
             await event.answer("Unrecognised unsubscribe command")
             raise events.StopPropagation
         # Parse menu data
-        menu_msg = await event.get_message()
-        menu_data = parse_hidden_data(menu_msg)
+        menu_msg, menu_data = await self._get_authorised_menu(event)
         link = menu_data["link"]
-        user_id = int(menu_data["user_id"])
-        # Check button is pressed by user who summoned the menu
-        await _check_sender(event, user_id)
+        escaped_link = html.escape(link)
         # Unsubscribe
         unsubscribe_request_count.inc()
-        await menu_msg.edit(
-            f"⏳ Unsubscribing from {html.escape(link)}...",
-            parse_mode="html",
-            link_preview=False,
-            buttons=None,
-        )
         chat_id = event.chat_id
-        await self.sub_manager.remove_subscription(link, chat_id)
+        try:
+            await self._with_deferred_progress(
+                self.sub_manager.remove_subscription(link, chat_id),
+                functools.partial(
+                    menu_msg.edit,
+                    f"⏳ Unsubscribing from {escaped_link}...",
+                    parse_mode="html",
+                    link_preview=False,
+                    buttons=None,
+                ),
+            )
+        except ValueError:
+            # The buttons stay live while the removal runs, so a second press can find the subscription already gone
+            if self.sub_manager.sub_for_link_and_chat(link, chat_id) is not None:
+                raise
         await menu_msg.edit(
-            f"Unsubscribed from {html.escape(link)}",
+            f"Unsubscribed from {escaped_link}",
             parse_mode="html",
             link_preview=False,
             buttons=None,
@@ -599,19 +928,14 @@ class Bot:
     async def handle_pause_callback(self, event: events.CallbackQuery.Event) -> None:
         # Parse callback data
         query_data = event.query.data
-        query_resp = query_data.removeprefix(b"pause:")
         # Parse menu data
-        menu_msg = await event.get_message()
-        menu_data = parse_hidden_data(menu_msg)
+        menu_msg, menu_data = await self._get_authorised_menu(event)
         link_str = menu_data["link"]
-        user_id = int(menu_data["user_id"])
-        # Check button is pressed by user who summoned the menu
-        await _check_sender(event, user_id)
         # Check callback data
-        if query_resp == b"pause":
+        if query_data == b"pause:pause":
             pause_request_count.inc()
             pause_sub = True
-        elif query_resp == b"resume":
+        elif query_data == b"pause:resume":
             unpause_request_count.inc()
             pause_sub = False
         else:
@@ -663,7 +987,7 @@ class Bot:
             "last_update": last_update.isoformat(),
         })
         version_text = self._gallery_dl_version_text(version, install_type, last_update)
-        await event.reply(
+        menu_msg = await event.reply(
             f"{menu_data}{version_text}\nWould you like to update it now?",
             parse_mode="html",
             buttons=[[
@@ -672,27 +996,23 @@ class Bot:
                 Button.inline("No thanks", "update:no"),
             ]],
         )
+        self._remember_menu(menu_msg)
         raise events.StopPropagation
 
     async def handle_update_callback(self, event: events.CallbackQuery.Event) -> None:
         # Parse callback data
         query_data = event.query.data
-        query_resp = query_data.removeprefix(b"update:")
         # Parse menu data
-        menu_msg = await event.get_message()
-        menu_data = parse_hidden_data(menu_msg)
-        user_id = int(menu_data["user_id"])
+        menu_msg, menu_data = await self._get_authorised_menu(event)
         version = menu_data["version"]
         install_type = menu_data["install_type"]
         last_update = datetime.datetime.fromisoformat(menu_data["last_update"])
-        # Check button is pressed by user who summoned the menu
-        await _check_sender(event, user_id)
         # Check callback data
-        if query_resp == b"stable":
+        if query_data == b"update:stable":
             update_func = self.dl_manager.update_tool
-        elif query_resp == b"dev":
+        elif query_data == b"update:dev":
             update_func = self.dl_manager.update_tool_prerelease
-        elif query_resp == b"no":
+        elif query_data == b"update:no":
             update_func = None
         else:
             await event.answer("Unrecognised update callback")
@@ -741,14 +1061,18 @@ class Bot:
             raise events.StopPropagation
         # Check if one of these args is a json dict
         dl_config = None
-        for i, dl_arg in enumerate(dl_args[:]):
+        for i, dl_arg in enumerate(dl_args):
+            # Only arguments shaped like a json object can be one, so skip parsing anything else
+            if not (dl_arg.startswith("{") and dl_arg.endswith("}")):
+                continue
             try:
                 dl_json = json.loads(dl_arg)
-                if isinstance(dl_json, dict):
-                    dl_config = dl_json
-                    dl_args = dl_args[:i] + dl_args[i+1:]
             except json.decoder.JSONDecodeError:
-                pass
+                continue
+            if isinstance(dl_json, dict):
+                dl_config = dl_json
+                dl_args = dl_args[:i] + dl_args[i+1:]
+                break
         # If dl config was set, fetch base config and merge with it
         if dl_config is not None:
             config_path = await self.dl_manager.create_merged_config_file(dl_config)
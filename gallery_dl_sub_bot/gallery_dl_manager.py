@@ -23,8 +23,12 @@ class GalleryDLManager:
         self.last_update: Optional[datetime.datetime] = None  # TODO: metrics, but would need to actually store it
         self.install_type: Optional[str] = None  # TODO: metric?
         self.rwlock = aiorwlock.RWLock()
+        self._version_cache: Optional[tuple[Optional[datetime.datetime], str]] = None
 
     async def get_tool_version(self) -> str:
+        # The installed version only changes when this manager installs or updates it, which sets last_update
+        if self._version_cache is not None and self._version_cache[0] == self.last_update:
+            return self._version_cache[1]
         logger.info("Checking gallery-dl version")
         async with self.rwlock.reader_lock:
             # TODO: would be cool to have a prometheus metric for this
@@ -33,6 +37,7 @@ class GalleryDLManager:
             if not version_line:
                 return "Unknown"
             version = version_line[0].removeprefix("Version: ")
+            self._version_cache = (self.last_update, version)
             return version
 
     async def install_tool(self) -> None:
@@ -17,13 +17,12 @@ def hidden_data(data: dict[str, str]) -> str:
 def parse_hidden_data(evt: events.NewMessage.Event) -> Optional[dict[str, str]]:
     for url_entity, inner_text in evt.get_entities_text(MessageEntityTextUrl):
         url = url_entity.url
-        url_parse = urllib.parse.urlparse(url)
+        url_parse = urllib.parse.urlsplit(url)
         if url_parse.netloc != HIDDEN_DOMAIN:
             continue
         if not url_parse.query:
             continue
-        qs = urllib.parse.parse_qs(url_parse.query)
         try:
-            return {key: vals[0] for key, vals in qs.items()}
+            return dict(urllib.parse.parse_qsl(url_parse.query))
         except ValueError:
             continue
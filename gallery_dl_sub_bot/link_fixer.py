@@ -2,8 +2,9 @@ import json
 import logging
 import urllib.parse
 from abc import ABC
-from typing import Optional
+from typing import Iterable, Optional
 
+import aiofiles
 import yaml
 from jinja2 import Environment, BaseLoader
 
@@ -19,7 +20,9 @@ class LinkMatcher(ABC):
         self.link_match = link_match
 
     def matches_link(self, link: str) -> bool:
-        parsed = urllib.parse.urlparse(link)
+        return self.matches_parsed(urllib.parse.urlsplit(link))
+
+    def matches_parsed(self, parsed: urllib.parse.SplitResult) -> bool:
         if isinstance(self.link_match, str):
             return parsed.netloc == self.link_match
         for key, val in self.link_match.items():
@@ -34,14 +37,14 @@ class LinkFix(LinkMatcher):
         self.link_target = link_target
 
     def fix_link(self, link: str) -> str:
-        parsed = urllib.parse.urlparse(link)
-        if isinstance(self.link_target, str):
-            parsed = parsed._replace(**{"netloc": self.link_target})
-        else:
-            parsed = parsed._replace(**self.link_target)
         # noinspection PyTypeChecker
         # (For some reason, it thinks this returns Literal[b""])
-        return urllib.parse.urlunparse(parsed)
+        return urllib.parse.urlunsplit(self.fix_parsed(urllib.parse.urlsplit(link)))
+
+    def fix_parsed(self, parsed: urllib.parse.SplitResult) -> urllib.parse.SplitResult:
+        if isinstance(self.link_target, str):
+            return parsed._replace(**{"netloc": self.link_target})
+        return parsed._replace(**self.link_target)
 
 
 class CaptionOverride(LinkMatcher):
@@ -56,9 +59,12 @@ class CaptionOverride(LinkMatcher):
 
 
 class LinkFixer:
+    FIX_CACHE_SIZE = 4096
+
     def __init__(self):
         self.fixes: list[LinkFix] = []
         self.caption_overrides: list[CaptionOverride] = []
+        self._fix_cache: dict[str, str] = {}
         self.load_fixes()
 
     def load_fixes(self) -> None:
@@ -89,21 +95,42 @@ class LinkFixer:
             new_caption_overrides.append(CaptionOverride(caption_override["match"], caption_override["caption"]))
         self.fixes = new_fixes
         self.caption_overrides = new_caption_overrides
+        self._fix_cache.clear()
 
     def fix_link(self, link: str) -> str:
+        # Users often send the same links repeatedly, so fixed links are cached until the fixes are reloaded
+        if link in self._fix_cache:
+            return self._fix_cache[link]
+        fixed_link = self._apply_fixes(link)
+        if len(self._fix_cache) >= self.FIX_CACHE_SIZE:
+            self._fix_cache.clear()
+        self._fix_cache[link] = fixed_link
+        return fixed_link
+
+    def _apply_fixes(self, link: str) -> str:
+        # Parse the link once and apply every matching fix to the parsed form, rather than re-parsing for each fix
+        parsed = urllib.parse.urlsplit(link)
+        fixed = False
         for fix in self.fixes:
-            if fix.matches_link(link):
-                link = fix.fix_link(link)
-        return link
+            if fix.matches_parsed(parsed):
+                parsed = fix.fix_parsed(parsed)
+                fixed = True
+        if not fixed:
+            return link
+        # noinspection PyTypeChecker
+        return urllib.parse.urlunsplit(parsed)
+
+    def fix_links(self, links: Iterable[str]) -> list[str]:
+        return [self.fix_link(link) for link in links]
 
-    def override_caption(self, link: str | list[str], data_filename: str) -> Optional[str]:
+    async def override_caption(self, link: str | list[str], data_filename: str) -> Optional[str]:
         if not isinstance(link, str):
             return None
         for override in self.caption_overrides:
             if override.matches_link(link):
                 try:
-                    with open(data_filename, "r") as f:
-                        data = json.load(f)
+                    async with aiofiles.open(data_filename, "r") as f:
+                        data = json.loads(await f.read())
                 except Exception as e:
                     logger.warning("Failed to open post metadata to format caption", exc_info=e)
                     return None
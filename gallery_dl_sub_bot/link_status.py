@@ -0,0 +1,64 @@
+import asyncio
+import collections
+import html
+import logging
+from typing import Optional
+
+from telethon import events
+from telethon.tl.custom import Message
+
+logger = logging.getLogger(__name__)
+
+
+# One message listing the download status of several links, edited as each one progresses. Failing to send or edit it
+# is only logged, as the downloads should carry on regardless
+class LinkStatusMessage:
+    MAX_LENGTH = 4096
+    SUMMARY_ALLOWANCE = 200
+
+    def __init__(self, links: list[str]) -> None:
+        self.statuses = {link: "⏳ Waiting to download" for link in links}
+        self.msg: Optional[Message] = None
+        self._sent_text: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    def text(self) -> str:
+        lines = [f"- {html.escape(link)}: {status}" for link, status in self.statuses.items()]
+        text = "Found these links:\n" + "\n".join(lines)
+        if len(text) <= self.MAX_LENGTH:
+            return text
+        # Telegram limits message length, so list as many links as fit, and count up the statuses of the rest
+        text = "Found these links:"
+        shown = 0
+        for line in lines:
+            if len(text) + len(line) + 1 > self.MAX_LENGTH - self.SUMMARY_ALLOWANCE:
+                break
+            text += "\n" + line
+            shown += 1
+        hidden_statuses = list(self.statuses.values())[shown:]
+        status_counts = collections.Counter(status.split(" ", 1)[0] for status in hidden_statuses)
+        counts_text = ", ".join(f"{status} {count}" for status, count in status_counts.items())
+        return text + f"\n... and {len(hidden_statuses)} more links: {counts_text}"
+
+    async def send(self, request_evt: events.NewMessage.Event) -> None:
+        text = self.text()
+        try:
+            self.msg = await request_evt.reply(text, parse_mode="html", link_preview=False)
+        except Exception as e:
+            logger.warning("Failed to send link status message", exc_info=e)
+            return
+        self._sent_text = text
+
+    async def set_status(self, link: str, status: str) -> None:
+        self.statuses[link] = status
+        # Edits are serialised, and skipped if another edit has already sent the latest statuses
+        async with self._lock:
+            text = self.text()
+            if self.msg is None or text == self._sent_text:
+                return
+            try:
+                await self.msg.edit(text, parse_mode="html", link_preview=False)
+            except Exception as e:
+                logger.warning("Failed to update link status message", exc_info=e)
+                return
+            self._sent_text = text
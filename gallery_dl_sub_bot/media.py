@@ -0,0 +1,60 @@
+import asyncio
+import io
+import os
+from typing import Optional
+
+from telethon import TelegramClient, utils
+from telethon.tl.types import InputMediaUploadedPhoto, InputMediaUploadedDocument
+
+try:
+    # Telethon only resizes photos when pillow is installed, so the same goes here
+    import PIL.Image
+except ImportError:
+    PIL = None
+
+MAX_PHOTO_DIMENSION = 2560
+MAX_PHOTO_BYTES = 10 * 1024 * 1024
+
+
+# Shrinks a photo to fit telegram's photo limits, returning the original path if it already fits or cannot be opened.
+# This follows telethon's private _resize_photo_if_needed, except that it only takes a path, and always flattens
+# transparency onto white by way of RGBA, where telethon only masks images which have transparency data
+def _resize_photo(file_path: str) -> str | io.BytesIO:
+    if PIL is None:
+        return file_path
+    try:
+        with PIL.Image.open(file_path) as image:
+            fits = image.width <= MAX_PHOTO_DIMENSION and image.height <= MAX_PHOTO_DIMENSION
+            if image.mode == "RGB" and fits and os.path.getsize(file_path) <= MAX_PHOTO_BYTES:
+                return file_path
+            # Keep the EXIF data, so that photos are still shown the right way up
+            exif = image.info.get("exif", b"")
+            image.thumbnail((MAX_PHOTO_DIMENSION, MAX_PHOTO_DIMENSION), PIL.Image.LANCZOS)
+            # JPEG has no alpha channel, so transparent areas are filled in with white
+            rgba_image = image.convert("RGBA")
+            photo = PIL.Image.new("RGB", rgba_image.size, (255, 255, 255))
+            photo.paste(rgba_image, mask=rgba_image.getchannel("A"))
+            buffer = io.BytesIO()
+            photo.save(buffer, "JPEG", progressive=True, exif=exif)
+    except OSError:
+        return file_path
+    buffer.seek(0)
+    buffer.name = f"{os.path.splitext(os.path.basename(file_path))[0]}.jpg"
+    return buffer
+
+
+# Uploads a file and builds the media to send it as, the same as telethon does when sending a file by path, so that
+# files can be uploaded ahead of sending them without losing photo resizing or video dimensions and duration
+async def upload_media(
+        client: TelegramClient,
+        file_path: str,
+        part_size_kb: Optional[int] = None,
+) -> InputMediaUploadedPhoto | InputMediaUploadedDocument:
+    if utils.is_image(file_path):
+        photo = await asyncio.to_thread(_resize_photo, file_path)
+        file_handle = await client.upload_file(photo, part_size_kb=part_size_kb)
+        return InputMediaUploadedPhoto(file_handle)
+    file_handle = await client.upload_file(file_path, part_size_kb=part_size_kb)
+    # Reads video metadata with hachoir, if it is installed
+    attributes, mime_type = await asyncio.to_thread(utils.get_attributes, file_path)
+    return InputMediaUploadedDocument(file_handle, mime_type, attributes)
@@ -1,6 +1,7 @@
 import asyncio
 import dataclasses
 import datetime
+import functools
 import glob
 import html
 import logging
@@ -24,6 +25,12 @@ if typing.TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 ZIP_SIZE_LIMIT = "1500m"
+# Media formats which are already compressed, so are stored in zips as-is rather than wasting time deflating them.
+# zip matches these suffixes case-sensitively, so both cases are listed
+_ZIP_STORE_SUFFIXES = [
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".mp4", ".webm", ".mkv", ".mov", ".mp3", ".ogg", ".zip",
+]
+ZIP_STORE_SUFFIXES = ":".join(_ZIP_STORE_SUFFIXES + [suffix.upper() for suffix in _ZIP_STORE_SUFFIXES])
 subscription_posts_made = Counter(
     "gallerydlsubbot_subscription_posts_made_total",
     "Total number of posts made by subscription updates",
@@ -89,6 +96,10 @@ class Download:
     def link_str(self) -> str:
         return link_to_str(self.link)
 
+    @functools.cached_property
+    def escaped_link(self) -> str:
+        return html.escape(self.link_str)
+
     def list_files(self) -> list[str]:
         all_files = glob.glob(self.path + '/**/*.*', recursive=True)
         img_files = [f for f in all_files if os.path.isfile(f) and not (f.endswith(".json") or f.endswith(".sqlite"))]
@@ -113,7 +124,9 @@ class Download:
         zip_path = os.path.abspath(f"{zip_dir}/{filename}.zip")
         async with self.zip_lock:
             try:
-                await run_cmd(["zip", "-r", "-s", ZIP_SIZE_LIMIT, zip_path, "./"], cwd=self.path)
+                await run_cmd([
+                    "zip", "-r", "-s", ZIP_SIZE_LIMIT, "-n", ZIP_STORE_SUFFIXES, zip_path, "./",
+                ], cwd=self.path)
                 zip_files = await aiofiles.os.listdir(zip_dir)
                 zip_paths = [f"{zip_dir}/{filename}" for filename in zip_files]
                 yield sorted(zip_paths)
@@ -223,9 +236,9 @@ class Subscription(Download):
     async def send_new_items(self, new_items: list[str]) -> None:
         for new_item in new_items:
             file_handle = await self.client.upload_file(new_item)
-            caption = f"Update on feed: {html.escape(self.link_str)}"
+            caption = f"Update on feed: {self.escaped_link}"
             data_filename = f"{new_item}.json"
-            caption_override = self.sub_manager.link_fixer.override_caption(self.link, data_filename)
+            caption_override = await self.sub_manager.link_fixer.override_caption(self.link, data_filename)
             if caption_override:
                 caption = caption_override
             for dest in self.destinations:
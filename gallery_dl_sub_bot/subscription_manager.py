@@ -11,7 +11,7 @@ from prometheus_client import Gauge, Counter, Histogram
 from telethon import TelegramClient
 
 from gallery_dl_sub_bot.gallery_dl_manager import GalleryDLManager
-from gallery_dl_sub_bot.link_fixer import LinkFixer
+from gallery_dl_sub_bot.link_fixer import LinkFixer, link_to_str
 from gallery_dl_sub_bot.subscription import (
     Subscription,
     SubscriptionDestination,
@@ -100,6 +100,21 @@ class SubscriptionManager:
         self.complete_downloads = [
             CompleteDownload.from_json(dl_data, self) for dl_data in config_data.get("complete_downloads", [])
         ]
+        # Indexes of subscriptions and complete downloads by their link string, to avoid scanning on every lookup
+        self._subscriptions_by_link: dict[str, Subscription] = {}
+        for sub in self.subscriptions:
+            self._subscriptions_by_link.setdefault(sub.link_str, sub)
+        self._destinations_by_chat_and_link: dict[tuple[int, str], SubscriptionDestination] = {}
+        for sub in self.subscriptions:
+            for dest in sub.destinations:
+                self._destinations_by_chat_and_link.setdefault((dest.chat_id, sub.link_str), dest)
+        self._complete_downloads_by_link: dict[str, CompleteDownload] = {}
+        for dl in self.complete_downloads:
+            self._complete_downloads_by_link.setdefault(dl.link_str, dl)
+        # Incremented whenever subscription data is saved, so that anything rendered from it knows to refresh
+        self.version = 0
+        self._subscription_list_cache: dict[tuple[int, int], list[SubscriptionDestination]] = {}
+        self._subscription_list_cache_version = self.version
         self.running = False
         self.runner_task: Optional[Task] = None
         # Metrics
@@ -133,6 +148,7 @@ class SubscriptionManager:
         )
 
     def save(self) -> None:
+        self.version += 1
         config_data = {
             "subscriptions": [s.to_json() for s in self.subscriptions[:]],
             "complete_downloads": [dl.to_json() for dl in self.complete_downloads[:]],
@@ -140,23 +156,18 @@ class SubscriptionManager:
         with open(self.CONFIG_FILE, "w") as f:
             json.dump(config_data, f, indent=2)
 
-    def download_for_link(self, link: str) -> Optional[Download]:
-        for download in self.all_downloads:
-            if download.link == link or download.link_str == link:
-                return download
-        return None
+    def download_for_link(self, link: str | list[str]) -> Optional[Download]:
+        link_str = link_to_str(link)
+        sub = self._subscriptions_by_link.get(link_str)
+        if sub is not None:
+            return sub
+        return self._complete_downloads_by_link.get(link_str)
 
-    def sub_for_link(self, link: str) -> Optional[Subscription]:
-        for sub in self.subscriptions[:]:
-            if sub.link == link or sub.link_str == link:
-                return sub
-        return None
+    def sub_for_link(self, link: str | list[str]) -> Optional[Subscription]:
+        return self._subscriptions_by_link.get(link_to_str(link))
 
     def sub_for_link_and_chat(self, link: str, chat_id: int) -> Optional[SubscriptionDestination]:
-        matching_sub = self.sub_for_link(link)
-        if matching_sub is None:
-            return None
-        return matching_sub.matching_chat(chat_id)
+        return self._destinations_by_chat_and_link.get((chat_id, link_to_str(link)))
 
     async def create_download(self, link: str) -> Download:
         # See if a download already exists for this link
@@ -169,12 +180,15 @@ class SubscriptionManager:
             link, dl_path, now, self
         )
         self.complete_downloads.append(dl)
+        self._complete_downloads_by_link[dl.link_str] = dl
         self.save()
         return dl
 
     async def delete_download(self, dl: Download) -> None:
         if isinstance(dl, CompleteDownload):
             self.complete_downloads.remove(dl)
+            if self._complete_downloads_by_link.get(dl.link_str) is dl:
+                del self._complete_downloads_by_link[dl.link_str]
             if dl.active_download and False:
                 dl.active_download.kill()
             async with dl.zip_lock:
@@ -192,11 +206,12 @@ class SubscriptionManager:
         # If current download is a subscription, just add a new destination
         if isinstance(current_dl, Subscription):
             # See if that subscription already exists in this chat
-            if current_dl.matching_chat(chat_id):
+            if self.sub_for_link_and_chat(current_dl.link_str, chat_id):
                 raise ValueError("Subscription already exists in this chat for this link")
             # Extend existing subscription
             current_dl.destinations.append(dest)
             dest.subscription = current_dl
+            self._destinations_by_chat_and_link[(chat_id, current_dl.link_str)] = dest
             self.save()
             return current_dl
         # If not a CompleteDownload, raise exception
@@ -218,6 +233,8 @@ class SubscriptionManager:
         )
         # Add new subscription, remove download
         self.subscriptions.append(sub)
+        self._subscriptions_by_link[sub.link_str] = sub
+        self._destinations_by_chat_and_link[(chat_id, sub.link_str)] = dest
         # Delete download
         await self.delete_download(current_dl)
         self.save()
@@ -229,8 +246,11 @@ class SubscriptionManager:
             raise ValueError("Cannot find matching subscription for this link and chat")
         matching_sub = found_dest.subscription
         matching_sub.destinations.remove(found_dest)
+        del self._destinations_by_chat_and_link[(chat_id, matching_sub.link_str)]
         if len(matching_sub.destinations) == 0:
             self.subscriptions.remove(matching_sub)
+            if self._subscriptions_by_link.get(matching_sub.link_str) is matching_sub:
+                del self._subscriptions_by_link[matching_sub.link_str]
             async with matching_sub.zip_lock:
                 await aioshutil.rmtree(matching_sub.path)
         self.save()
@@ -243,8 +263,7 @@ class SubscriptionManager:
         self.save()
 
     def start(self) -> None:
-        event_loop = asyncio.get_event_loop()
-        self.runner_task = event_loop.create_task(self.run())
+        self.runner_task = asyncio.create_task(self.run())
 
     async def run(self) -> None:
         self.running = True
@@ -297,11 +316,10 @@ class SubscriptionManager:
             await asyncio.sleep(0.5)
             now = datetime.datetime.now(datetime.timezone.utc)
 
-    def stop(self) -> None:
+    async def stop(self) -> None:
         self.running = False
-        loop = asyncio.get_event_loop()
         if self.runner_task and not self.runner_task.done():
-            loop.run_until_complete(self.runner_task)
+            await self.runner_task
         # Kill all downloads in progress
         for dl in self.all_downloads:
             if dl.active_download is not None and not dl.active_download.complete:
@@ -311,6 +329,13 @@ class SubscriptionManager:
 
     def list_subscriptions(self, chat_id: int, user_id: int) -> list[SubscriptionDestination]:
         """Lists all the subscriptions matching a given destination and creator, ordered by creation date"""
+        # Listings are cached until subscription data next changes, so that paging through menus skips the scan
+        if self._subscription_list_cache_version != self.version:
+            self._subscription_list_cache.clear()
+            self._subscription_list_cache_version = self.version
+        key = (chat_id, user_id)
+        if key in self._subscription_list_cache:
+            return self._subscription_list_cache[key]
         sub_dests: list[Optional[SubscriptionDestination]] = [
             sub.matching_dest(chat_id, user_id) for sub in self.subscriptions[:]
         ]
@@ -318,4 +343,5 @@ class SubscriptionManager:
             sd for sd in sub_dests if sd is not None
         ]
         sorted_sub_dests = sorted(non_null, key=lambda dest: dest.created_date)
+        self._subscription_list_cache[key] = sorted_sub_dests
         return sorted_sub_dests